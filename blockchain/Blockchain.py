@@ -1,56 +1,84 @@
 from __future__ import annotations
-import time, json, hashlib, random
-from dataclasses import dataclass, asdict
+import time, json, hashlib, random, os
+import multiprocessing as mp
+import queue
+from dataclasses import dataclass, field, replace
 from typing import List, Optional
 
+if __package__:  # python -m blockchain.Blockchain / import blockchain.Blockchain
+    from .Hashing import (
+        IncrementalMerkle,
+        find_nonce,
+        json_num,
+        json_str,
+        merkle_root_bytes,
+        tx_digest,
+    )
+else:  # executado como script, com blockchain/ no sys.path
+    from Hashing import (
+        IncrementalMerkle,
+        find_nonce,
+        json_num,
+        json_str,
+        merkle_root_bytes,
+        tx_digest,
+    )
+
 
 # ------------------------------------------------------
-# Funções utilitárias de hash
+# Configurações de dificuldade
 # ------------------------------------------------------
-def sha256(x: bytes) -> str:
-    return hashlib.sha256(x).hexdigest()
-
-
-def jhash(obj) -> str:
-    """Hash de um objeto JSON com chaves ordenadas (estável)."""
-    return sha256(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode())
-
-
-def merkle_root(hashes: List[str]) -> str:
-    """Calcula a Merkle Root a partir de uma lista de hashes."""
-    if not hashes:
-        return sha256(b"")
-    layer = hashes[:]
-    while len(layer) > 1:
-        if len(layer) % 2 == 1:
-            layer.append(layer[-1])
-        nxt = []
-        for i in range(0, len(layer), 2):
-            nxt.append(sha256(bytes.fromhex(layer[i]) + bytes.fromhex(layer[i + 1])))
-        layer = nxt
-    return layer[0]
+DIFFICULTY_BITS = 20  # bits zero iniciais exigidos (20 bits = 5 zeros hex)
+# Alvo: o digest (big-endian) precisa ser menor que 2**(256 - DIFFICULTY_BITS).
+# Comparar bytes de mesmo tamanho equivale a comparar os inteiros.
+TARGET = (1 << (256 - DIFFICULTY_BITS)).to_bytes(32, "big")
 
 
 # ------------------------------------------------------
-# Configurações de dificuldade
+# Prova de trabalho
 # ------------------------------------------------------
-DIFFICULTY_PREFIX = "00000"  # quanto mais zeros, mais difícil
+POW_POLL = 0.5  # segundos entre checagens de workers vivos em mine_parallel
+
+
+def _pow_worker(prefix, suffix, target, start, stop, step, found, results):
+    """Processo filho: varre os nonces n ≡ start (mod step) até alguém encontrar."""
+    n = find_nonce(prefix, suffix, target, start, stop, step, should_stop=found.is_set)
+    if n is not None:
+        found.set()
+    results.put(n)  # None: faixa esgotada (ou outro worker já encontrou)
 
 
 # ------------------------------------------------------
 # Estruturas principais
 # ------------------------------------------------------
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Transaction:
     sender: str
     recipient: str
     amount: float
+    _digest: bytes = field(default=b"", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Imutável: o hash é calculado uma única vez, na criação
+        object.__setattr__(
+            self, "_digest", tx_digest(self.sender, self.recipient, self.amount)
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "sender": self.sender,
+            "recipient": self.recipient,
+            "amount": self.amount,
+        }
+
+    def digest(self) -> bytes:
+        return self._digest
 
     def hash(self) -> str:
-        return jhash(asdict(self))
+        return self.digest().hex()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Block:
     index: int
     timestamp: float
@@ -68,8 +96,28 @@ class Block:
             "nonce": self.nonce,
         }
 
+    def header_parts(self) -> tuple[bytes, bytes]:
+        """Cabeçalho serializado dividido em (prefixo, sufixo) ao redor do nonce.
+
+        Os bytes são os mesmos de jhash(header_dict()): chaves em ordem
+        alfabética e sem espaços.
+        """
+        prefix = b'{"index":%s,"merkle_root":%s,"nonce":' % (
+            json_num(self.index),
+            json_str(self.merkle_root),
+        )
+        suffix = b',"prev_hash":%s,"timestamp":%s}' % (
+            json_str(self.prev_hash),
+            json_num(round(self.timestamp, 6)),
+        )
+        return prefix, suffix
+
+    def digest(self) -> bytes:
+        prefix, suffix = self.header_parts()
+        return hashlib.sha256(prefix + json_num(self.nonce) + suffix).digest()
+
     def hash(self) -> str:
-        return jhash(self.header_dict())
+        return self.digest().hex()
 
 
 # ------------------------------------------------------
@@ -78,13 +126,19 @@ class Block:
 class Blockchain:
     def __init__(self):
         self.chain: List[Block] = []
-        self.mem_pool: List[Transaction] = []
+        self.clear_mem_pool()
         self.create_genesis()
 
+    def clear_mem_pool(self):
+        """Esvazia o mempool e sua árvore de Merkle incremental."""
+        self.mem_pool: List[Transaction] = []
+        # A folha 0 fica reservada para a coinbase, conhecida só na mineração
+        self.mem_tree = IncrementalMerkle([bytes(32)])
+
     def create_genesis(self):
         """Cria o bloco gênesis inicial."""
         genesis_tx = Transaction(sender="network", recipient="satoshi", amount=50.0)
-        root = merkle_root([genesis_tx.hash()])
+        root = merkle_root_bytes([genesis_tx.digest()]).hex()
         genesis = Block(
             index=0,
             timestamp=time.time(),
@@ -101,16 +155,33 @@ class Blockchain:
 
     def add_transaction(self, sender: str, recipient: str, amount: float):
         """Adiciona uma nova transação ao mempool."""
-        self.mem_pool.append(Transaction(sender, recipient, amount))
-
-    def mine(self, miner_address: str, max_tries: int = 2_000_000) -> Optional[Block]:
-        """Minera um novo bloco (Prova de Trabalho)."""
+        tx = Transaction(sender, recipient, amount)
+        self.mem_pool.append(tx)
+        self.mem_tree.append(tx.digest())
+
+    def _sync_mem_tree(self):
+        """Reconstrói a árvore se o mem_pool foi alterado fora de add_transaction.
+
+        As folhas 1..N devem ser os digests do mem_pool, na mesma ordem; a
+        conferência só compara digests já calculados, sem hashear nada.
+        """
+        digests = [t.digest() for t in self.mem_pool]
+        if self.mem_tree.levels[0][1:] != digests:
+            self.mem_tree = IncrementalMerkle([bytes(32)] + digests)
+
+    def _new_block(self, miner_address: str) -> Block:
+        """Monta o bloco candidato (recompensa + mempool) com nonce zerado.
+
+        O bloco é imutável: a mineração busca o nonce sobre os bytes do cabeçalho
+        e só então cria o bloco definitivo com replace().
+        """
         reward_tx = Transaction(sender="network", recipient=miner_address, amount=6.25)
         txs = [reward_tx] + self.mem_pool
-        tx_hashes = [t.hash() for t in txs]
-        root = merkle_root(tx_hashes)
+        self._sync_mem_tree()
+        self.mem_tree.update(0, reward_tx.digest())
+        root = self.mem_tree.root().hex()
 
-        block = Block(
+        return Block(
             index=len(self.chain),
             timestamp=time.time(),
             prev_hash=self.last_block.hash(),
@@ -119,34 +190,112 @@ class Blockchain:
             transactions=txs,
         )
 
-        for n in range(max_tries):
-            block.nonce = n
-            h = block.hash()
-            if h.startswith(DIFFICULTY_PREFIX):
-                self.chain.append(block)
-                self.mem_pool = []
-                return block
-        return None
+    def _append_mined(self, block: Block, nonce: int) -> Block:
+        block = replace(block, nonce=nonce)
+        self.chain.append(block)
+        self.clear_mem_pool()
+        return block
 
-    def valid_chain(self) -> bool:
-        """Valida toda a cadeia de blocos."""
-        for i in range(1, len(self.chain)):
-            b = self.chain[i]
-            prev = self.chain[i - 1]
-
-            # 1) Encadeamento
-            if b.prev_hash != prev.hash():
-                return False
+    def mine(self, miner_address: str, max_tries: int = 2_000_000) -> Optional[Block]:
+        """Minera um novo bloco (Prova de Trabalho)."""
+        block = self._new_block(miner_address)
+        prefix, suffix = block.header_parts()
+        n = find_nonce(prefix, suffix, TARGET, 0, max_tries)
+        if n is None:
+            return None
+        return self._append_mined(block, n)
+
+    @staticmethod
+    def _collect_nonce(workers, results) -> Optional[int]:
+        """Espera as respostas dos workers até surgir um nonce.
+
+        Cada worker responde uma única vez (o nonce ou None). A fila é lida
+        com timeout: se todos os processos já terminaram e nada mais chega,
+        algum morreu sem responder (exceção, OOM, sinal) e a busca desiste.
+        """
+        for _ in workers:
+            while True:
+                try:
+                    nonce = results.get(timeout=POW_POLL)
+                    break
+                except queue.Empty:
+                    if any(w.is_alive() for w in workers):
+                        continue
+                    try:  # todos terminaram: só resta o que já está no pipe
+                        nonce = results.get(timeout=POW_POLL)
+                        break
+                    except queue.Empty:
+                        return None
+            if nonce is not None:
+                return nonce
+        return None
 
-            # 2) Prova de trabalho
-            if not b.hash().startswith(DIFFICULTY_PREFIX):
-                return False
+    def mine_parallel(
+        self,
+        miner_address: str,
+        max_tries: int = 2_000_000,
+        n_workers: Optional[int] = None,
+    ) -> Optional[Block]:
+        """Minera um novo bloco dividindo os nonces entre vários processos.
+
+        O worker k testa os nonces n ≡ k (mod n_workers); o primeiro que
+        encontrar um hash válido sinaliza os demais para pararem.
+        """
+        n_workers = n_workers or os.cpu_count() or 1
+        block = self._new_block(miner_address)
+        prefix, suffix = block.header_parts()
+
+        found = mp.Event()
+        results = mp.Queue()
+        workers = [
+            mp.Process(
+                target=_pow_worker,
+                args=(prefix, suffix, TARGET, k, max_tries, n_workers, found, results),
+                daemon=True,
+            )
+            for k in range(n_workers)
+        ]
+        for w in workers:
+            w.start()
+
+        try:
+            nonce = self._collect_nonce(workers, results)
+        finally:
+            found.set()
+            for w in workers:
+                w.join(timeout=POW_POLL)
+                if w.is_alive():
+                    w.terminate()
+                    w.join()
+
+        if nonce is None:
+            return None
+        return self._append_mined(block, nonce)
 
-            # 3) Conferência da Merkle Root
-            calc_root = merkle_root([t.hash() for t in b.transactions])
-            if calc_root != b.merkle_root:
-                return False
-        return True
+    def valid_chain(self) -> bool:
+        """Valida toda a cadeia de blocos.
+
+        Os hashes dos cabeçalhos são calculados uma única vez, de início; cada
+        regra é então uma passada sobre a cadeia que para no primeiro bloco
+        inválido. Os campos guardados são comparados exatamente, como texto.
+        """
+        blocks = self.chain[1:]
+        digests = [b.digest() for b in self.chain]  # cada cabeçalho, uma única vez
+
+        # 1) Encadeamento: prev_hash[i] == hash(bloco[i - 1])
+        if any(b.prev_hash != d.hex() for b, d in zip(blocks, digests)):
+            return False
+
+        # 2) Prova de trabalho
+        if any(d >= TARGET for d in digests[1:]):
+            return False
+
+        # 3) Conferência da Merkle Root
+        return all(
+            b.merkle_root
+            == merkle_root_bytes([t.digest() for t in b.transactions]).hex()
+            for b in blocks
+        )
 
     def to_dict(self):
         """Serializa a blockchain para exibição."""
@@ -154,7 +303,7 @@ class Blockchain:
             {
                 **b.header_dict(),
                 "hash": b.hash(),
-                "transactions": [asdict(t) for t in b.transactions],
+                "transactions": [t.to_dict() for t in b.transactions],
             }
             for b in self.chain
         ]
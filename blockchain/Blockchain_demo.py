@@ -16,66 +16,70 @@ from __future__ import annotations
 import time
 import json
 import hashlib
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field, replace
 from typing import List, Optional
 
-
-# ------------------------------------------------------------
-# Funções utilitárias
-# ------------------------------------------------------------
-def sha256(b: bytes) -> str:
-    """Retorna o hash SHA-256 de um conjunto de bytes."""
-    return hashlib.sha256(b).hexdigest()
-
-
-def jhash(obj) -> str:
-    """Hash estável (JSON com chaves ordenadas)."""
-    return sha256(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode())
-
-
-def merkle_root(hashes: List[str]) -> str:
-    """Calcula a Merkle Root a partir de uma lista de hashes."""
-    if not hashes:
-        return sha256(b"")
-    layer = hashes[:]
-    while len(layer) > 1:
-        if len(layer) % 2 == 1:
-            layer.append(layer[-1])  # Duplica o último se for ímpar
-        next_layer = []
-        for i in range(0, len(layer), 2):
-            next_layer.append(
-                sha256(bytes.fromhex(layer[i]) + bytes.fromhex(layer[i + 1]))
-            )
-        layer = next_layer
-    return layer[0]
-
-
-# Dificuldade de mineração (mais zeros = mais difícil)
-DIFFICULTY_PREFIX = "0000"
+if __package__:  # python -m blockchain.Blockchain_demo
+    from .Hashing import (
+        find_nonce,
+        json_num,
+        json_str,
+        merkle_root_bytes,
+        tx_digest,
+        tx_template,
+    )
+else:  # executado como script, com blockchain/ no sys.path
+    from Hashing import (
+        find_nonce,
+        json_num,
+        json_str,
+        merkle_root_bytes,
+        tx_digest,
+        tx_template,
+    )
+
+
+# Dificuldade de mineração: bits zero iniciais do hash (16 bits = 4 zeros hex)
+DIFFICULTY_BITS = 16
+# O hash é válido se o digest (big-endian) for menor que este alvo
+TARGET = (1 << (256 - DIFFICULTY_BITS)).to_bytes(32, "big")
+
+# Template do hash da transação, com os nomes de campo em português
+TEMPLATE_TX = tx_template(("remetente", "destinatario", "valor"))
 
 
 # ------------------------------------------------------------
 # Classe Transacao
 # ------------------------------------------------------------
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Transacao:
-    """Representa uma transação simples entre duas carteiras."""
+    """Representa uma transação simples (imutável) entre duas carteiras."""
 
     remetente: str
     destinatario: str
     valor: float
+    _digest: bytes = field(default=b"", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # O hash é calculado uma única vez, na criação da transação
+        digest = tx_digest(self.remetente, self.destinatario, self.valor, TEMPLATE_TX)
+        object.__setattr__(self, "_digest", digest)
+
+    def digest(self) -> bytes:
+        """Digest bruto da transação (o mesmo hash de jhash dos três campos)."""
+        return self._digest
 
     def hash(self) -> str:
         """Retorna o hash da transação."""
-        return jhash(asdict(self))
+        return self.digest().hex()
 
 
 # ------------------------------------------------------------
 # Classe Bloco
 # ------------------------------------------------------------
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Bloco:
-    """Representa um bloco na blockchain."""
+    """Representa um bloco (imutável) na blockchain."""
 
     indice: int
     timestamp: float
@@ -94,9 +98,28 @@ class Bloco:
             "nonce": self.nonce,
         }
 
+    def partes_cabecalho(self) -> tuple[bytes, bytes]:
+        """Cabeçalho serializado dividido em (prefixo, sufixo) ao redor do nonce.
+
+        Os bytes são os mesmos de jhash(cabecalho()): chaves em ordem
+        alfabética e sem espaços.
+        """
+        prefixo = b'{"hash_anterior":%s,"indice":%s,"merkle_root":%s,"nonce":' % (
+            json_str(self.hash_anterior),
+            json_num(self.indice),
+            json_str(self.merkle_root),
+        )
+        sufixo = b',"timestamp":%s}' % (json_num(round(self.timestamp, 6)),)
+        return prefixo, sufixo
+
+    def digest(self) -> bytes:
+        """Calcula o digest bruto do cabeçalho."""
+        prefixo, sufixo = self.partes_cabecalho()
+        return hashlib.sha256(prefixo + json_num(self.nonce) + sufixo).digest()
+
     def hash(self) -> str:
         """Calcula o hash do cabeçalho."""
-        return jhash(self.cabecalho())
+        return self.digest().hex()
 
 
 # ------------------------------------------------------------
@@ -113,7 +136,7 @@ class Blockchain:
     def criar_bloco_genesis(self):
         """Cria o primeiro bloco (gênesis)."""
         genesis_tx = Transacao(remetente="network", destinatario="satoshi", valor=50.0)
-        root = merkle_root([genesis_tx.hash()])
+        root = merkle_root_bytes([genesis_tx.digest()]).hex()
         genesis = Bloco(
             indice=0,
             timestamp=time.time(),
@@ -139,8 +162,7 @@ class Blockchain:
         # Transação de recompensa (coinbase)
         recompensa = Transacao(remetente="network", destinatario=minerador, valor=6.25)
         transacoes = [recompensa] + self.mem_pool
-        tx_hashes = [t.hash() for t in transacoes]
-        root = merkle_root(tx_hashes)
+        root = merkle_root_bytes([t.digest() for t in transacoes]).hex()
 
         novo_bloco = Bloco(
             indice=len(self.chain),
@@ -153,29 +175,32 @@ class Blockchain:
 
         # Prova de trabalho
         print("\n⛏️ Minerando bloco... (pode levar alguns segundos)")
-        for n in range(max_tentativas):
-            novo_bloco.nonce = n
+        prefixo, sufixo = novo_bloco.partes_cabecalho()
+        n = find_nonce(prefixo, sufixo, TARGET, 0, max_tentativas)
+        if n is not None:
+            novo_bloco = replace(novo_bloco, nonce=n)
+            self.chain.append(novo_bloco)
+            self.mem_pool = []  # limpa o mempool
             h = novo_bloco.hash()
-            if h.startswith(DIFFICULTY_PREFIX):
-                self.chain.append(novo_bloco)
-                self.mem_pool = []  # limpa o mempool
-                print(f"✔️ Bloco {novo_bloco.indice} minerado com sucesso! Hash: {h}")
-                return novo_bloco
+            print(f"✔️ Bloco {novo_bloco.indice} minerado com sucesso! Hash: {h}")
+            return novo_bloco
 
         print("❌ Falha na mineração: limite de tentativas atingido.")
         return None
 
     def validar(self) -> bool:
         """Verifica a integridade da blockchain."""
+        # Cada cabeçalho é hasheado uma única vez (serve como "atual" e "anterior")
+        hashes = [bloco.digest() for bloco in self.chain]
         for i in range(1, len(self.chain)):
             atual = self.chain[i]
-            anterior = self.chain[i - 1]
 
-            if atual.hash_anterior != anterior.hash():
+            if atual.hash_anterior != hashes[i - 1].hex():
                 return False
-            if not atual.hash().startswith(DIFFICULTY_PREFIX):
+            if hashes[i] >= TARGET:
                 return False
-            if merkle_root([t.hash() for t in atual.transacoes]) != atual.merkle_root:
+            root = merkle_root_bytes([t.digest() for t in atual.transacoes])
+            if root.hex() != atual.merkle_root:
                 return False
         return True
 
@@ -1,18 +1,223 @@
 # ================================================================
-# Teste simples de funções hash
+# Funções de hash compartilhadas pelos módulos da blockchain
 # ================================================================
 
+from __future__ import annotations
 import hashlib
 import json
+import math
+from json.encoder import encode_basestring_ascii
+from typing import Callable, Iterable, List, Optional, Tuple
 
 
+# ------------------------------------------------------------
+# Hash e serialização canônica
+# ------------------------------------------------------------
 def sha256(x: bytes) -> str:
     """Retorna o hash SHA-256 de um conjunto de bytes."""
     return hashlib.sha256(x).hexdigest()
 
 
-print("hash('Ola') =", sha256(b"Ola"))
-print(
-    "hash de JSON estável =",
-    sha256(json.dumps({"a": 1, "b": 2}, sort_keys=True).encode()),
-)
+def jhash(obj) -> str:
+    """Hash de um objeto JSON com chaves ordenadas (estável).
+
+    É a serialização de referência: os templates de bytes de Transaction e
+    Block reproduzem exatamente esta saída, e nenhum caminho quente passa por
+    aqui. Por isso o json da stdlib é mantido (orjson/msgspec escrevem UTF-8
+    cru e 1e16 em vez de 1e+16, o que mudaria os hashes).
+    """
+    return sha256(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode())
+
+
+def json_str(s: str) -> bytes:
+    """Codifica uma string exatamente como o json.dumps (ASCII, entre aspas)."""
+    return encode_basestring_ascii(s).encode()
+
+
+def json_num(x) -> bytes:
+    """Codifica um número exatamente como o json.dumps.
+
+    Floats finitos e ints usam o repr (o mesmo do json); NaN, Infinity, bool e
+    demais tipos passam pelo próprio json.dumps.
+    """
+    if type(x) is float and math.isfinite(x):
+        return float.__repr__(x).encode()
+    if type(x) is int:
+        return int.__repr__(x).encode()
+    return json.dumps(x).encode()
+
+
+def tx_template(keys: Tuple[str, str, str]) -> Tuple[bytes, int, int, int]:
+    """Monta o template de tx_digest para os nomes (remetente, destinatário, valor).
+
+    Devolve os bytes do objeto com as chaves já ordenadas como no jhash e, para
+    cada lacuna %s, qual dos três valores a ocupa. Feito uma vez, na importação.
+    """
+    order = sorted(range(3), key=keys.__getitem__)
+    fields = [json_str(keys[i]).replace(b"%", b"%%") + b":%s" for i in order]
+    return (b"{" + b",".join(fields) + b"}", *order)
+
+
+TX_TEMPLATE = tx_template(("sender", "recipient", "amount"))
+
+
+def tx_digest(
+    sender: str,
+    recipient: str,
+    amount: float,
+    template: Tuple[bytes, int, int, int] = TX_TEMPLATE,
+) -> bytes:
+    """Digest de uma transação, os mesmos bytes de jhash dos três campos.
+
+    Serialização canônica e hash numa única passada: sem dict nem str
+    intermediários, só o template de bytes entregue direto ao sha256. Outros
+    nomes de campo usam o template de tx_template(keys).
+    """
+    fmt, a, b, c = template
+    values = (json_str(sender), json_str(recipient), json_num(amount))
+    return hashlib.sha256(fmt % (values[a], values[b], values[c])).digest()
+
+
+# ------------------------------------------------------------
+# Merkle Root
+# ------------------------------------------------------------
+def _merkle_level(layer: bytes) -> bytes:
+    """Hasheia todos os pares de 64 bytes de uma camada em uma única passada."""
+    # Os dois filhos já estão lado a lado na camada, então o par sai de um único
+    # fatiamento de 64 bytes; medido, sha256(fatia) ganha de sha256(memoryview)
+    # e de dois update(). IncrementalMerkle guarda os nós separados e, por não
+    # ter a fatia pronta, usa dois update() em vez de somar os filhos.
+    h = hashlib.sha256
+    return b"".join([h(layer[i : i + 64]).digest() for i in range(0, len(layer), 64)])
+
+
+def merkle_root_bytes(digests: List[bytes]) -> bytes:
+    """Calcula a Merkle Root (32 bytes) a partir dos digests brutos."""
+    if not digests:
+        return hashlib.sha256(b"").digest()
+    layer = b"".join(digests)
+    while len(layer) > 32:
+        if len(layer) % 64:
+            layer += layer[-32:]
+        layer = _merkle_level(layer)
+    return layer
+
+
+def merkle_root(hashes: List[str]) -> str:
+    """Calcula a Merkle Root a partir de uma lista de hashes."""
+    return merkle_root_bytes([bytes.fromhex(h) for h in hashes]).hex()
+
+
+class IncrementalMerkle:
+    """Árvore de Merkle que cresce uma folha por vez.
+
+    Guarda todas as camadas da árvore; append() e update() recalculam só o
+    caminho da folha até a raiz, em O(log N), seguindo a mesma regra de
+    merkle_root_bytes (o último nó de uma camada ímpar é duplicado).
+    """
+
+    def __init__(self, leaves: Iterable[bytes] = ()):
+        self.levels: List[List[bytes]] = [[]]
+        for digest in leaves:
+            self.append(digest)
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def append(self, digest: bytes) -> None:
+        self.levels[0].append(digest)
+        self._refresh(len(self.levels[0]) - 1)
+
+    def update(self, index: int, digest: bytes) -> None:
+        """Troca a folha `index` (ex.: a coinbase) e recalcula seus ancestrais."""
+        self.levels[0][index] = digest
+        self._refresh(index)
+
+    def root(self) -> bytes:
+        if not self.levels[0]:
+            return hashlib.sha256(b"").digest()
+        return self.levels[-1][0]
+
+    def _refresh(self, index: int) -> None:
+        k = 0
+        while len(self.levels[k]) > 1:
+            level = self.levels[k]
+            left = index & ~1
+            right = left + 1 if left + 1 < len(level) else left  # duplica o ímpar
+            h = hashlib.sha256(level[left])
+            h.update(level[right])
+            parent = h.digest()
+            if k + 1 == len(self.levels):
+                self.levels.append([])
+            upper = self.levels[k + 1]
+            index //= 2
+            if index < len(upper):
+                upper[index] = parent
+            else:
+                upper.append(parent)
+            k += 1
+
+
+# ------------------------------------------------------------
+# Prova de trabalho
+# ------------------------------------------------------------
+NONCE_TABLE = 1000  # nonces por grupo: os 3 dígitos finais vêm de uma tabela
+
+
+def find_nonce(
+    prefix: bytes,
+    suffix: bytes,
+    target: bytes,
+    start: int,
+    stop: int,
+    step: int = 1,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Optional[int]:
+    """Procura em range(start, stop, step) um nonce com sha256(cabeçalho) < target.
+
+    Laço interno da mineração: tudo que não depende do nonce é preparado antes
+    e cada tentativa faz só copy/update/digest no hashlib (em C) e compara o
+    digest bruto com o alvo, sem gerar a string hexadecimal.
+
+    O nonce é dividido em n = alto * 1000 + baixo. Os dígitos altos entram no
+    midstate uma vez por grupo; os 3 dígitos baixos já vêm concatenados ao
+    sufixo numa tabela pré-montada, então nenhum int é formatado por tentativa.
+    should_stop, se dado, é consultado uma vez por grupo.
+
+    O cabeçalho testado é prefix + dígitos decimais do nonce + suffix.
+    """
+    # Midstate: o prefixo do cabeçalho é absorvido uma única vez. O hashlib.sha256
+    # do CPython usa o OpenSSL, que já escolhe em tempo de execução o núcleo
+    # SHA-NI (ou AVX2/SSSE3) da CPU para cada bloco de compressão.
+    root = hashlib.sha256(prefix).copy
+    size = NONCE_TABLE
+    padded = None  # b"000<sufixo>" .. b"999<sufixo>", para grupos com dígitos altos
+    for hi in range(start // size, -(-stop // size)):
+        if should_stop is not None and should_stop():
+            return None
+        base = hi * size
+        first = max(start, base)
+        first += (start - first) % step  # mantém n ≡ start (mod step)
+        if hi:
+            if padded is None:
+                padded = [b"%03d%s" % (d, suffix) for d in range(size)]
+            ctx = root()
+            ctx.update(b"%d" % hi)
+            copy, tails = ctx.copy, padded
+        else:  # primeiro grupo: 0..999 sem zeros à esquerda
+            copy, tails = root, [b"%d%s" % (d, suffix) for d in range(size)]
+        for lo in range(first - base, min(stop - base, size), step):
+            h = copy()
+            h.update(tails[lo])
+            if h.digest() < target:
+                return base + lo
+    return None
+
+
+# Demonstração
+if __name__ == "__main__":
+    print("hash('Ola') =", sha256(b"Ola"))
+    print(
+        "hash de JSON estável =",
+        sha256(json.dumps({"a": 1, "b": 2}, sort_keys=True).encode()),
+    )
@@ -1,34 +1,11 @@
 # ================================================================
-# Teste isolado da Merkle Root
+# Teste isolado da Merkle Root (implementação em Hashing.py)
 # ================================================================
 
-import hashlib
-import json
-
-
-def sha256(x: bytes) -> str:
-    """Retorna o hash SHA-256 de bytes."""
-    return hashlib.sha256(x).hexdigest()
-
-
-def merkle_root(hashes: list[str]) -> str:
-    """Calcula a Merkle Root a partir de uma lista de hashes (strings hexadecimais)."""
-    if not hashes:
-        return sha256(b"")  # Raiz do vazio
-
-    layer = hashes[:]
-    while len(layer) > 1:
-        if len(layer) % 2 == 1:
-            layer.append(layer[-1])  # Duplica o último (padrão comum)
-
-        next_layer = []
-        for i in range(0, len(layer), 2):
-            combined = bytes.fromhex(layer[i]) + bytes.fromhex(layer[i + 1])
-            next_layer.append(sha256(combined))
-
-        layer = next_layer
-
-    return layer[0]
+if __package__:  # python -m blockchain.Merkle_root / import blockchain.Merkle_root
+    from .Hashing import merkle_root, sha256
+else:  # executado como script, com blockchain/ no sys.path
+    from Hashing import merkle_root, sha256
 
 
 # Demonstração
@@ -0,0 +1,225 @@
+# ================================================================
+# Testes da blockchain (executar com: python -m pytest)
+# ================================================================
+
+import json
+import multiprocessing as mp
+import os
+from dataclasses import replace
+
+import pytest
+
+import Blockchain
+import Blockchain_demo
+from Hashing import (
+    IncrementalMerkle,
+    json_num,
+    json_str,
+    jhash,
+    merkle_root_bytes,
+    tx_digest,
+    tx_template,
+)
+
+# Alvo fácil (12 bits zero) para a mineração nos testes ser instantânea
+EASY_TARGET = (1 << (256 - 12)).to_bytes(32, "big")
+
+
+@pytest.fixture(autouse=True)
+def easy_difficulty(monkeypatch):
+    monkeypatch.setattr(Blockchain, "TARGET", EASY_TARGET)
+    monkeypatch.setattr(Blockchain_demo, "TARGET", EASY_TARGET)
+
+
+def test_mined_block_hash_matches_jhash_of_header():
+    bc = Blockchain.Blockchain()
+    bc.add_transaction("Alice", "Bob", 1.2)
+    block = bc.mine("miner1")
+
+    assert block is not None
+    assert block.hash() == jhash(block.header_dict())
+    assert block.digest() < EASY_TARGET
+    assert bc.valid_chain()
+
+
+def test_mined_bloco_hash_matches_jhash_of_cabecalho():
+    bc = Blockchain_demo.Blockchain()
+    bc.adicionar_transacao("Alice", "Bob", 1.2)
+    bloco = bc.minerar("minerador1")
+
+    assert bloco is not None
+    assert bloco.hash() == jhash(bloco.cabecalho())
+    assert bloco.digest() < EASY_TARGET
+    assert bc.validar()
+
+
+# Valores que o json.dumps serializa de forma diferente do repr do Python
+STRINGS = ["Alice", "", "Ção", 'aspas "x"', "barra \\ e \n", "emoji 🚀"]
+NUMBERS = [0, 7, -3, 1.2, 6.25, 1e16, 1e-7, 2.5e-300, True, False]
+NUMBERS += [float("nan"), float("inf"), float("-inf")]
+
+
+def canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+@pytest.mark.parametrize("s", STRINGS)
+def test_json_str_matches_json_dumps(s):
+    assert json_str(s) == json.dumps(s).encode()
+
+
+@pytest.mark.parametrize("x", NUMBERS)
+def test_json_num_matches_json_dumps(x):
+    assert json_num(x) == json.dumps(x).encode()
+
+
+@pytest.mark.parametrize("name", STRINGS)
+@pytest.mark.parametrize("amount", NUMBERS)
+def test_transaction_hashes_match_jhash(name, amount):
+    tx = Blockchain.Transaction(sender=name, recipient="Bob", amount=amount)
+    assert tx.hash() == jhash(tx.to_dict())
+
+    t = Blockchain_demo.Transacao(remetente=name, destinatario="Bob", valor=amount)
+    fields = {"remetente": name, "destinatario": "Bob", "valor": amount}
+    assert t.hash() == jhash(fields)
+
+
+@pytest.mark.parametrize("keys", [("z", "a", "m"), ("a%s", "b", "ç"), ("x", "y", "w")])
+def test_tx_digest_with_custom_keys_matches_jhash(keys):
+    fields = dict(zip(keys, ("Alice", "Bob", 1.5)))
+    assert tx_digest("Alice", "Bob", 1.5, tx_template(keys)).hex() == jhash(fields)
+
+
+@pytest.mark.parametrize("timestamp", [1791970257.304243, 1.0, 0, float("nan")])
+def test_headers_match_canonical_json(timestamp):
+    block = Blockchain.Block(
+        index=3,
+        timestamp=timestamp,
+        prev_hash="ab" * 32,
+        merkle_root="cd" * 32,
+        nonce=12345,
+        transactions=[],
+    )
+    prefix, suffix = block.header_parts()
+    assert prefix + b"12345" + suffix == canonical(block.header_dict())
+    assert block.hash() == jhash(block.header_dict())
+
+    bloco = Blockchain_demo.Bloco(
+        indice=3,
+        timestamp=timestamp,
+        hash_anterior="ab" * 32,
+        merkle_root="cd" * 32,
+        nonce=12345,
+        transacoes=[],
+    )
+    prefixo, sufixo = bloco.partes_cabecalho()
+    assert prefixo + b"12345" + sufixo == canonical(bloco.cabecalho())
+    assert bloco.hash() == jhash(bloco.cabecalho())
+
+
+# Alterações do hash guardado: lixo, vazio, maiúsculas, espaços embutidos
+TAMPERS = [
+    lambda h: "zz",
+    lambda h: "",
+    lambda h: h.upper(),
+    lambda h: " ".join(h[i : i + 2] for i in range(0, len(h), 2)),
+]
+
+
+@pytest.mark.parametrize("field", ["hash_anterior", "merkle_root"])
+@pytest.mark.parametrize("tamper", TAMPERS)
+def test_validar_rejects_malformed_hashes(monkeypatch, field, tamper):
+    # Sem prova de trabalho (todo digest < alvo): só as comparações são testadas
+    monkeypatch.setattr(Blockchain_demo, "TARGET", b"\xff" * 33)
+    bc = Blockchain_demo.Blockchain()
+    bc.minerar("minerador1")
+    bloco = bc.chain[1]
+    bc.chain[1] = replace(bloco, **{field: tamper(getattr(bloco, field))})
+    assert bc.validar() is False
+
+
+@pytest.mark.parametrize("field", ["prev_hash", "merkle_root"])
+@pytest.mark.parametrize("tamper", TAMPERS)
+def test_valid_chain_rejects_malformed_hashes(monkeypatch, field, tamper):
+    monkeypatch.setattr(Blockchain, "TARGET", b"\xff" * 33)
+    bc = Blockchain.Blockchain()
+    bc.mine("miner1")
+    block = bc.chain[1]
+    bc.chain[1] = replace(block, **{field: tamper(getattr(block, field))})
+    assert bc.valid_chain() is False
+
+
+def test_valid_chain_stops_at_first_bad_merkle_root(monkeypatch):
+    bc = Blockchain.Blockchain()
+    for miner in ("m1", "m2", "m3"):
+        bc.add_transaction("Alice", "Bob", 1.0)
+        bc.mine(miner)
+    other = Blockchain.Transaction("Eve", "Mallory", 9.0)
+    bc.chain[1] = replace(bc.chain[1], transactions=[other])
+
+    calls = []
+    real = Blockchain.merkle_root_bytes
+    monkeypatch.setattr(
+        Blockchain, "merkle_root_bytes", lambda ds: calls.append(ds) or real(ds)
+    )
+    assert bc.valid_chain() is False
+    assert len(calls) == 1  # só o bloco 1 teve a raiz recalculada
+
+
+def test_mine_parallel_finds_valid_block():
+    bc = Blockchain.Blockchain()
+    bc.add_transaction("Alice", "Bob", 1.2)
+    block = bc.mine_parallel("miner1", n_workers=3)
+
+    assert block is not None
+    assert block.hash() == jhash(block.header_dict())
+    assert bc.valid_chain()
+    assert bc.mem_pool == []
+
+
+def _dying_worker(*args):
+    os._exit(1)  # morre sem responder na fila
+
+
+@pytest.mark.skipif(
+    mp.get_start_method() != "fork", reason="worker trocado só propaga com fork"
+)
+def test_mine_parallel_does_not_hang_when_workers_die(monkeypatch):
+    monkeypatch.setattr(Blockchain, "_pow_worker", _dying_worker)
+    bc = Blockchain.Blockchain()
+
+    assert bc.mine_parallel("miner1", n_workers=2) is None
+    assert len(bc.chain) == 1
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda pool, tx: pool.append(tx),
+        lambda pool, tx: pool.insert(0, tx),
+        lambda pool, tx: pool.__setitem__(0, tx),
+        lambda pool, tx: pool.pop(),
+        lambda pool, tx: pool.reverse(),
+    ],
+)
+def test_mine_covers_mem_pool_edited_directly(edit):
+    bc = Blockchain.Blockchain()
+    bc.add_transaction("Alice", "Bob", 1.0)
+    bc.add_transaction("Carol", "Dave", 2.0)
+    edit(bc.mem_pool, Blockchain.Transaction("Eve", "Mallory", 3.0))
+    pending = list(bc.mem_pool)
+
+    block = bc.mine("miner1")
+    assert block.transactions[1:] == pending
+    assert bc.valid_chain()
+
+
+def test_incremental_merkle_matches_full_rebuild():
+    leaves = [bytes([i]) * 32 for i in range(1, 20)]
+    tree = IncrementalMerkle()
+    for i, leaf in enumerate(leaves):
+        tree.append(leaf)
+        assert tree.root() == merkle_root_bytes(leaves[: i + 1])
+    leaves[0] = b"\x00" * 32
+    tree.update(0, leaves[0])
+    assert tree.root() == merkle_root_bytes(leaves)